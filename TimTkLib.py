@@ -3,8 +3,7 @@ Widgets, in the order they appear, are ConfirmButton, StatusBox, DynOptionMenu,
 NumberedProgBar, LabelledEntry, Switch, GroupableCheck, CheckPanel, and SelectionWindow'''
 import tkinter as tk
 import tkinter.ttk as ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from functools import partial
 
 
 class ConfirmButton: 
@@ -27,9 +26,13 @@ class StatusBox:
         self.reset_default()
         
     def set_status(self, status):
-        if type(status) != bool:
-            raise Exception(TypeError)    
-        elif status:
+        if not isinstance(status, bool):
+            raise TypeError('Status must be a bool')
+        self.set_status_fast(status)
+            
+    def set_status_fast(self, status):
+        '''Unchecked version of set_status, for frequent callers which are known to pass bools'''
+        if status:
             self.status_box.configure(bg='green2', text=self.on_message)
         else:
             self.status_box.configure(bg='light gray', text=self.off_message)
@@ -44,13 +47,19 @@ class DynOptionMenu:
         self.option_method = option_method
         self.opargs = opargs # any additional arguments that need to be passed to the option-getting method
         self.default = default
-        self.menu = tk.OptionMenu(frame, var, (None,) )
+        
+        options = tuple(self.option_method(*self.opargs))
+        self.menu = tk.OptionMenu(frame, var, *(options or ((None,),)) ) # seed with the actual options where possible, so the initial update needn't rebuild the menu
         self.menu.configure(width=width)
         self.menu.grid(row=row, column=col, columnspan=colspan)
         
         self.var = var
         self.contents = self.menu.children['menu']
-        self.update()
+        self.last_options = options or None # options currently in the menu, used to avoid needlessly rebuilding the menu contents
+        if options:
+            self.reset_default() # menu is already up to date, no need to query the options again
+        else:
+            self.update()
         
     def enable(self):
         self.menu.configure(state='normal')
@@ -62,9 +71,17 @@ class DynOptionMenu:
         self.var.set(self.default)
     
     def update(self):
-        self.contents.delete(0, 'end')
-        for option in self.option_method(*self.opargs):
-            self.contents.add_command(label=option, command=lambda x=option: self.var.set(x))
+        '''Refresh the menu contents; only entries which have actually changed are rebuilt'''
+        options = tuple(self.option_method(*self.opargs))
+        if options != self.last_options:
+            n_kept = len(self.last_options or ())
+            if self.last_options is None or options[:n_kept] != self.last_options: # unless options have only been appended, all entries must be rebuilt
+                self.contents.delete(0, 'end')
+                n_kept = 0
+
+            for option in options[n_kept:]:
+                self.contents.add_command(label=option, command=partial(self.var.set, option))
+            self.last_options = options
         self.reset_default()
         
 class NumberedProgBar():
@@ -73,6 +90,7 @@ class NumberedProgBar():
         self.curr_val = None
         self.default = default
         self.maximum = maximum
+        self.label_pending = False # whether a label update has already been scheduled for the next idle period
         self.style = ttk.Style(frame)
         
         self.style_name = f'NumberedProgBar{style_num}'
@@ -97,7 +115,14 @@ class NumberedProgBar():
         else:
             self.curr_val = val
             self.configure(value=self.curr_val)
-            self.style.configure(self.style_name, text=f'{self.curr_val}/{self.maximum}')
+            if not self.label_pending: # restyling is expensive, so label updates are coalesced and only applied once the GUI is idle
+                self.label_pending = True
+                self.prog_bar.after_idle(self.update_label)
+                
+    def update_label(self):
+        '''Write the current progress to the bar's label; called at idle time, so only the most recent value is ever displayed'''
+        self.label_pending = False
+        self.style.configure(self.style_name, text=f'{self.curr_val}/{self.maximum}')
             
     def set_max(self, new_max):
         '''change the maximum value of the progress bar (including the label)'''
@@ -121,16 +146,27 @@ class ToggleFrame(tk.LabelFrame):
         
         self.main = window
         self.state = default_state
+        self.children_snapshot, self.tk_paths, self.ttk_paths = None, [], [] # cached partition of child widgets, rebuilt whenever the children change
         self.apply_state(default_state)
-    
+
+    def partition_children(self):
+        '''Separate the Tcl pathnames of child widgets into tk and ttk widgets, only repartitioning when the children of the frame have changed'''
+        children = tuple(self.children.values()) # tkinter's own record of child widgets, unlike winfo_children() this requires no Tcl round-trip
+        if children != self.children_snapshot:
+            self.children_snapshot = children
+            self.tk_paths, self.ttk_paths = [], []
+            for widget in children: # tkinter.ttk widgets are enabled and disabled completely differently, for no good reason
+                (self.ttk_paths if isinstance(widget, ttk.Widget) else self.tk_paths).append(widget._w)
+        return self.tk_paths, self.ttk_paths
+
     def apply_state(self, new_state):
         self.state = new_state
-        for widget in self.winfo_children():
-            try:
-                widget.configure(state = self.state)
-            except tk.TclError: # tkinter.ttk widgets are enabled and disabled completely differently, for no good reason
-                state = ((self.state == 'normal') and '!disabled' or self.state)
-                widget.state([state])
+        ttk_state = ((self.state == 'normal') and '!disabled' or self.state)
+        tk_paths, ttk_paths = self.partition_children()
+
+        script = [f'{path} configure -state {self.state}' for path in tk_paths] + [f'{path} state {ttk_state}' for path in ttk_paths]
+        if script:
+            self.tk.eval(';'.join(script)) # apply all state changes in a single Tcl call, rather than one round-trip per widget
             
     def enable(self):
         self.apply_state('normal')
@@ -191,6 +227,8 @@ class Switch:
         self.on_color = on_color
         self.off_text = off_text
         self.off_color = off_color
+        self.on_config  = ('normal', on_text, on_color) # (state, text, color) settings for each switch position, precomputed to avoid rebuilding on every toggle
+        self.off_config = ('disabled', off_text, off_color)
     
         self.dependents = dependents # list containing other tk or ttl objects who's normal/disabled status depends on this switch instance's value
         self.dep_state = dep_state
@@ -206,13 +244,19 @@ class Switch:
     
     def set_value(self, value):
         self.value = value
-        state, text, color = self.value and ('normal', self.on_text, self.on_color) or ('disabled', self.off_text, self.off_color)
+        state, text, color = self.on_config if self.value else self.off_config
         
         self.switch.configure(text=text, bg=color)
         self.dep_state = state
         if self.dependents:
+            script = []
             for widget in self.dependents:
-                widget.configure(state=self.dep_state)
+                if isinstance(widget, tk.Widget):
+                    script.append(f'{widget._w} configure -state {self.dep_state}')
+                else:
+                    widget.configure(state=self.dep_state) # composite widgets (e.g. LabelledEntry) must handle their own configuration
+            if script:
+                self.switch.tk.eval(';'.join(script)) # configure all plain widgets in a single Tcl call
                 
     def enable(self):
         self.set_value(True)
@@ -232,45 +276,59 @@ class Switch:
         
 class GroupableCheck:
     '''A checkbutton which will add to or remove its value from an output list
-    (passed as an argument when creating an instance) based on its check status'''
-    def __init__(self, frame, value, output, state='normal', row=0, col=0):
+    (passed as an argument when creating an instance) based on its check status.
+    The output may instead be a set, which makes removal O(1) for large groups of checks'''
+    def __init__(self, frame, value, output, state='normal', row=0, col=0, defer_grid=False):
         self.var = tk.StringVar()
         self.value = value
         self.output = output
         self.state = state
+        self.selected = False # tracked here, rather than by reading back the check variable from Tcl on each click
+        
+        if isinstance(output, set):
+            self.add_value, self.remove_value = output.add, output.discard
+        else:
+            self.add_value, self.remove_value = output.append, output.remove # list.remove is O(N), prefer set outputs for large panels
         
         self.cb = tk.Checkbutton(frame, text=value, variable=self.var, onvalue=self.value, offvalue=None, state=self.state, command=self.edit_output) 
-        self.cb.grid(row=row, column=col, sticky='w')
-        self.cb.deselect()
+        if not defer_grid: # gridding and deselection can be deferred, to allow many checks to be placed at once (see CheckPanel)
+            self.cb.grid(row=row, column=col, sticky='w')
+            self.cb.deselect()
         
     def edit_output(self):
-        if self.var.get() == self.value:
-            self.output.append(self.value)
-        else:
-            self.output.remove(self.value)
+        self.selected = not self.selected
+        (self.add_value if self.selected else self.remove_value)(self.value)
             
     def configure(self, **kwargs):
         self.cb.configure(**kwargs)
 
-ceildiv = lambda a, b : -(a // -b) # ceiling analogue of floor division, useful for scaling grids by span
-
+        
 class CheckPanel:
     '''A panel of GroupableChecks, allows for simple selectivity of the contents of some list. 
-    Behaves like RadioButtons, except selection of multiple (or even all) buttons is allowedd'''
+    Behaves like RadioButtons, except selection of multiple (or even all) buttons is allowedd. Output can be a list or a set'''
     def __init__(self, frame, data, output, default_state='normal', ncols=4, row_start=0, col_start=0):
         self.output   = output
         self.state    = default_state
-        self.row_span = ceildiv(len(data), ncols)
+        self.row_span = -(len(data) // -ncols) # ceiling division, gives number of rows needed to fit all checks
+        
+        self.panel = [GroupableCheck(frame, val, output, state=self.state, defer_grid=True) for val in data]
+        self.tk = frame.tk
+        self.cb_paths = [gc.cb._w for gc in self.panel] # Tcl pathnames of the checkbuttons, allows for batched reconfiguration
         
-        self.panel = [GroupableCheck(frame, val, output, state=self.state, row=row_start + i//ncols, col=col_start + i%ncols) for i, val in enumerate(data)]
+        script = []
+        for i, path in enumerate(self.cb_paths):
+            row, col = divmod(i, ncols)
+            script.append(f'grid {path} -row {row_start + row} -column {col_start + col} -sticky w;{path} deselect')
+        if script:
+            self.tk.eval(';'.join(script)) # place and deselect all checks in a single Tcl call, rather than two round-trips per check
         
     def wipe_output(self):
         self.output.clear()
         
     def apply_state(self, new_state):
         self.state = new_state
-        for gc in self.panel:
-            gc.configure(state=self.state)
+        if self.cb_paths: # configure all checkbuttons in a single Tcl call, rather than one round-trip per check
+            self.tk.eval(';'.join(f'{path} configure -state {self.state}' for path in self.cb_paths))
     
     def enable(self):
         self.apply_state('normal')
@@ -310,13 +368,18 @@ class SelectionWindow:
 
     def toggle_all(self):
         '''Invert state of all checks in panel, making appropriate list changes in the process'''
-        for option in self.panel.panel:
-            option.cb.invoke()
+        if self.panel.cb_paths: # invoke all checks in a single Tcl call; pass a set as output to make each resulting removal O(1)
+            self.window.tk.eval(';'.join(f'{path} invoke' for path in self.panel.cb_paths))
         
         
 class DynamicPlot:
     def __init__(self, main, title, xlabel, ylabel, x_default=100, y_default=1, figsize=5, dpi=45, line_color='r', row=0, col=0, rs=1, cs=1):
         '''A matplotlib plot embedded in a TK window which can efficiently plot and update lines through arbitrary point'''
+        import numpy as np # imported here, rather than at module level, so that numpy and matplotlib are only loaded if a plot is actually needed
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.np, self.plt = np, plt
         self.fig = plt.figure(figsize=(figsize, figsize), dpi=dpi)       
         self.plot_window = FigureCanvasTkAgg(self.fig, main)
         self.plot_window.get_tk_widget().grid(row=row, column=col, rowspan=rs, columnspan=cs)
@@ -328,55 +391,76 @@ class DynamicPlot:
         self.ax.set_ylabel(ylabel)   
 
         self.bg = None
-        self.x, self.y = [], []  
+        self.capacity, self.n_points = 1024, 0 # points are stored in preallocated buffers (doubled when full), avoiding list-to-array conversion on each update
+        self.x_buf, self.y_buf = np.empty(self.capacity), np.empty(self.capacity)
         (self.line,) = self.ax.plot(self.x, self.y, line_color + '-', animated=True) # add expandibility for multiple lines here
+        self.fig.canvas.mpl_connect('draw_event', self.capture_bg) # background must be recaptured after every full draw
+        self.restore_region, self.draw_artist, self.blit = self.fig.canvas.restore_region, self.ax.draw_artist, self.fig.canvas.blit # bound once, as these are called for every point
+        self.ax_bbox = self.ax.bbox # bbox is updated in-place by matplotlib, so a single reference remains valid
         self.reset()
         
     def __del__(self):
-        plt.close() # close figure upon destruction (mainly applies to IPython window)
+        self.plt.close() # close figure upon destruction (mainly applies to IPython window)
+        
+    @property
+    def x(self):
+        return self.x_buf[:self.n_points]
+    
+    @property
+    def y(self):
+        return self.y_buf[:self.n_points]
     
     def redraw(self):
-        '''Redraw figure and recapture background'''
-        self.plot_window.draw()
+        '''Schedule a redraw of the figure at idle time, coalescing redraws requested in quick succession; the background is recaptured once drawn'''
+        self.plot_window.draw_idle()
+        
+    def capture_bg(self, event):
+        '''Recapture the background after a full draw, and redraw the (animated) line over it'''
         self.bg = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.line)
     
     def update_xvals(self, x):
-        '''Add new x-value to relevant containers. Double x-axis range if a points x-value exceed the current x limits'''
-        self.x.append(x)
-        self.line.set_xdata(self.x)
-        
-        xmax = max(self.ax.get_xlim()) # second member of xlimits is max
-        if x > xmax: # increase x scale 10-fold if number of epochs goes off screen
-            self.ax.set_xlim(0, 2*xmax)
+        '''Double x-axis range if a points x-value exceed the current x limits'''
+        if x > self.xmax: # double x scale if number of epochs goes off screen; cached limit avoids querying the axes for every point
+            self.xmax = 2*self.xmax
+            self.ax.set_xlim(0, self.xmax)
             self.redraw()        
             
     def update_yvals(self, y):
-        '''Add new y-value to relevant containers. Expand y-axis range to accomodate a new point if its y-value exceed the current y limits'''
-        self.y.append(y)
-        self.line.set_ydata(self.y)
-    
-        ymax = max(self.ax.get_ylim()) # second member of xlimits is max
-        if y > ymax: # increase x scale 10-fold if number of epochs goes off screen
-            self.ax.set_ylim(0, y)
+        '''Expand y-axis range to accomodate a new point if its y-value exceed the current y limits'''
+        if y > self.ymax: # expand y scale to fit the new point if it goes off screen
+            self.ymax = y
+            self.ax.set_ylim(0, self.ymax)
             self.redraw() 
             
     def update(self, x, y): 
         '''Plot a new point (x, y) along the existing line'''
+        if self.n_points == self.capacity: # double the size of the buffers when full, for amortized constant-time appends
+            self.capacity *= 2
+            self.x_buf, self.y_buf = self.np.resize(self.x_buf, self.capacity), self.np.resize(self.y_buf, self.capacity)
+        self.x_buf[self.n_points], self.y_buf[self.n_points] = x, y
+        self.n_points += 1
+        
         self.update_xvals(x)
         self.update_yvals(y)
+        self.line.set_data(self.x, self.y) # pass updated data to the line once per point, rather than once per axis
 
-        self.fig.canvas.restore_region(self.bg)
-        self.ax.draw_artist(self.line)
-        self.fig.canvas.blit(self.ax.bbox)           
+        if self.bg is not None: # no background exists to blit over until the first draw has occurred
+            self.restore_region(self.bg)
+            self.draw_artist(self.line)
+            self.blit(self.ax_bbox)           
     
     def reset(self, cutoff=None):    
         '''Blank out and reset plot'''
-        for data_list in (self.x, self.y, self.ax.lines):
-            data_list.clear()
+        self.n_points = 0 # buffers are simply overwritten, no need to clear them
+        self.line.set_data(self.x, self.y)
+        for line in [line for line in self.ax.lines if line is not self.line]: # remove any previous cutoff lines; axes' artist lists cannot be cleared directly
+            line.remove()
         
         if cutoff:
             self.ax.axhline(y=cutoff, linestyle='--', color='c')
             
-        self.ax.set_xlim(0, self.x_default)
-        self.ax.set_ylim(0, self.y_default)
+        self.xmax, self.ymax = self.x_default, self.y_default # current axis limits, tracked here to avoid querying the axes on each update
+        self.ax.set_xlim(0, self.xmax)
+        self.ax.set_ylim(0, self.ymax)
         self.redraw()
\ No newline at end of file
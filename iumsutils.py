@@ -1,16 +1,49 @@
-import csv, json, random, re, collections
+import contextlib, csv, json, os, random, re, shutil, statistics, collections, collections.abc, functools, typing
+import numpy as np
 from pathlib import Path
+
+try:
+    import orjson # optional, but parses and writes the float-heavy spectral data several times faster than the standard json module
+except ImportError:
+    orjson = None
+
+# naming constants, defined once at module level rather than rebuilt on every call
+_IUPAC_SUFFICES = { 'ate':'Acetates', # Esters might be preferable outside the context of the current datasets
+                    'ol':'Alcohols',
+                    'al':'Aldehydes',
+                    'ane':'Alkanes',
+                    'ene':'Alkenes',
+                    'yne':'Alkynes',
+                    'ine':'Amines',
+                    'oic acid': 'Carboxylic Acids',
+                    'ether':'Ethers',
+                    'one':'Ketones'  }
+
+_IUPAC_NUMBERING = {'meth' : 1,
+                    'eth(?!er)' : 2, # prevents all ethers from being assigned "2"
+                    'prop' : 3,
+                    'but'  : 4,
+                    'pent' : 5,
+                    'hex'  : 6,
+                    'hept' : 7,
+                    'oct'  : 8,
+                    'non(?!e)' : 9, # prevents all ketones from being assigned "9"
+                    'dec'  : 10}
+
+_REP_FLAGS = {'MIBK' : 'Methyl-iBu-Ketone', # dictionary of names to flag and replace to ensure total consistency of naming between files
+              'Propanol' : '1-Propanol',     # add flags as they come up, these are the ones for Modes 1-3 I've come across so far
+              'Butanol'  : '1-Butanol',
+              'Pentanol' : '1-Pentanol',
+              'Hexanol'  : '1-Hexanol',
+              'Heptanol' : '1-Heptanol',
+              'Octanol'  : '1-Octanol',
+              'IsoButanol'  : 'Isobutanol',
+              'Iso-Butanol' : 'Isobutanol',
+              'Sec Butyl Acetate' : 'Sec-Butyl Acetate',
+              'Secbutyl Acetate'  : 'Sec-Butyl Acetate'} 
  
-# utilities specifically written to avoid having to import entire modules for a single object's functionality
-def average(iterable, precision=4): 
-    '''Calculate and return average of an iterable'''
-    isum, n = 0, 0
-    for i in iterable: # iterates, rather than using sum/len, so that generators work as inputs
-        isum += i
-        n += 1
-    avg = isum/n
-    return (precision and round(avg, precision) or avg)
 
+# utilities specifically written to avoid having to import entire modules for a single object's functionality
 def format_time(sec):
     '''Converts a duration in seconds into an h:mm:ss string; written explicitly to avoid importing datetime.timedelta'''
     minutes, seconds = divmod(round(sec), 60)
@@ -23,33 +56,55 @@ def ceildiv(a, b):
         
     
 # some general-purpose utilities
+def average(iterable, precision=4): 
+    '''Calculate and return average of an iterable'''
+    avg = statistics.fmean(iterable) # accepts generators, and sums in C with full floating-point precision
+    return round(avg, precision) if precision else avg
+
 def ordered_and_counted(iterable):
     '''Takes an iterable of items and returns a sorted set of the items, and a dict of the counts of each item
     Specifically useful for getting the listing and counts of both species and families when jsonizing or transforming'''
-    data = [i for i in iterable] # temporarily store data, in the case that the iterable is a generator
-    return sorted(set(data)), collections.Counter(data)
+    counts = collections.Counter(iterable) # single pass, works for generators; the keys of the Counter are already the unique items
+    return sorted(counts), counts
 
 def normalized(iterable):
-    '''Normalize an iterable using min-max feature scaling (casts all values between 0 and 1)'''
-    try:
-        return tuple( (i - min(iterable))/(max(iterable) - min(iterable)) for i in iterable)
-    except ZeroDivisionError: # if all data have the same value, max=min and min/max normalization will fail
-        return tuple(i for i in iterable) # in that case, just return the original data
+    '''Normalize an iterable using min-max feature scaling (casts all values between 0 and 1), returned as a numpy array'''
+    data = np.fromiter(iterable, dtype=float) # fromiter allows for generators as well as sequences
+    if data.size == 0: # no extrema exist for empty data, so there is nothing to normalize
+        return data
+    lo, hi = data.min(), data.max() # extrema computed once, rather than once per element
+    if hi == lo: # if all data have the same value, max=min and min/max normalization will fail
+        return data # in that case, just return the original data
+    return (data - lo)/(hi - lo)
     
-def dictmerge(dictlist):
-    '''Takes a list of dictionaries with identical keys and combines them into a single dictionary with the values combined into lists under each entry'''
-    return {key : [subdict[key] for subdict in dictlist] for key in dictlist[0]}
+def dictmerge(dictlist, stack=False):
+    '''Takes a list of dictionaries with identical keys and combines them into a single dictionary with the values combined into lists under each entry.
+    If stack is True, the values under each entry are instead combined into numpy arrays'''
+    merged = {key : [] for key in dictlist[0]}
+    for subdict in dictlist: # single pass over the dicts, rather than one pass per key
+        for key in merged:
+            merged[key].append(subdict[key]) # indexed explicitly, so that missing keys raise rather than misaligning the merged lists
+            
+    if stack:
+        return {key : np.asarray(values) for key, values in merged.items()}
+    return merged
 
 def multikey(some_dict, keyset):
     '''Takes a dictionary and an iterable of keys and returns Bool of whether or not the dict contains ALL of the listed keys'''
     return all(key in some_dict for key in keyset)
 
-def partition(iterable, condition):
+def partition(iterable, condition=None, condition_vec=None):
     '''Separates an iterable into two lists based on a truthy condition which can be applied to each item.
-    Returns two lists, the first containing those which meet the condition and the second containing the rest'''
+    Returns two lists, the first containing those which meet the condition and the second containing the rest.
+    For numpy arrays, a vectorized condition_vec (which maps the whole array to a boolean mask) can be passed instead, in which case two arrays are returned'''
+    if condition_vec is not None:
+        mask = np.asarray(condition_vec(iterable), dtype=bool)
+        return iterable[mask], iterable[~mask]
+    
     members, non_members = [], []
+    add_member, add_non_member = members.append, non_members.append # bound once, rather than looked up for every item
     for item in iterable:
-        (members if condition(item) else non_members).append(item)
+        (add_member if condition(item) else add_non_member)(item)
     return members, non_members
 
 def random_partitioner(proportion, count):
@@ -58,67 +113,110 @@ def random_partitioner(proportion, count):
     if not (0 <= proportion <= 1):
         raise ValueError('Proportion must be between 0 and 1, inclusive')
     else:
-        return iter(random.sample([i < proportion*count for i in range(count)], count))
+        n_true = int(ceildiv(proportion*count, 1)) # same number of Trues as there are integers in [0, count) below proportion*count
+        flags = bytearray(count) # one byte per flag, rather than a full Python object
+        flags[:n_true] = b'\x01'*n_true
+        random.shuffle(flags) # shuffled in-place using the random module, so that seeding via random.seed() remains effective
+        return map(bool, flags)
 
 def one_hot_mapping(iterable):
     '''Takes and iterable and returns a dictionary of the values in the iterable, assigned sequentially to one-hot vectors
-    each of which is the length of the iterable (akin to an identity matrix)'''
+    each of which is the length of the iterable (the rows of an identity matrix, returned as numpy arrays)'''
     items = [i for i in iterable] # temporarily store data, in the case that the iterable is a generator
-    return {value : tuple(int(val == value) for val in items) for value in items}
+    identity = np.eye(len(items), dtype=np.int8)
+    return {value : row for value, row in zip(items, identity)}
 
 def get_RIP(mode1_spectrum):
     '''Naive but surprisingly effective method for identifying the RIP value for Mode 1 spectra'''
-    return max(mode1_spectrum[:len(mode1_spectrum)//2]) # takes the RIP to be the maximum value in the first half of the spectrum
+    spectrum = np.asarray(mode1_spectrum) # no copy is made if the spectrum is already an array
+    return spectrum[:spectrum.shape[0]//2].max().item() # takes the RIP to be the maximum value in the first half of the spectrum; slicing an array gives a view, not a copy
 
             
 # utilities for handling instance naming and information packaging
+_TAIL_DIGITS = re.compile(r'[0-9]+\Z') # regexes are compiled once here, rather than being re-parsed (or looked up in re's cache) on every call
+
+_SUFFIX_PATTERNS = [(re.compile(rf'(?i){suffix}\Z'), family) for suffix, family in _IUPAC_SUFFICES.items()] # ignore capitalization (particular to ethers), only check end of name (particular to pinac<ol>one)
+_CARBON_PATTERNS = [(re.compile(rf'(?i){affix}'), re.compile(rf'(?i)(iso|sec-){affix}'), number) for affix, number in _IUPAC_NUMBERING.items()] # ignore capitalization (finds affix anywhere in word)
+
 def sort_instance_names(name_list, data_key=lambda x:x):
     '''Sorts a a list of instance names in ascending order based on the tailing digits. Optional "key" arg for when some operation is needed to return the name (e.g. Instance.name)'''
-    return sorted( name_list, key=lambda y : int(re.findall('[0-9]+\Z', data_key(y))[0]) )
-        
+    return sorted( name_list, key=lambda y : int(_TAIL_DIGITS.search(data_key(y)).group()) )
+
+@functools.lru_cache(maxsize=4096) # naming functions are pure and called repeatedly on the same names (e.g. in jsonize), so results are memoized
 def isolate_species(instance_name): # NOTE: consider expanding range of allowable strings in the future
     '''Strips extra numbers off the end of the name of an instance and just tells you its species'''
-    return re.sub('(\s|-)\d+\s*\Z', '', instance_name)  # regex to crop terminal digits off of an instance in a variety of possible formats
+    name = instance_name.rstrip() # equivalent to the regex sub(r'(\s|-)\d+\s*\Z', '', ...), but scans the tail directly, skipping the regex engine entirely for names without terminal digits
+    i = len(name) - 1
+    while i >= 0 and name[i].isdecimal(): # isdecimal matches exactly the characters that \d does
+        i -= 1
+        
+    if i < len(name) - 1 and i >= 0 and (name[i].isspace() or name[i] == '-'): # only crop if there are terminal digits, preceded by a space or dash
+        return name[:i]
+    return instance_name
 
+@functools.lru_cache(maxsize=4096)
 def get_family(species): # while called species, this method works with instance names as well
     '''Takes the name of a species OR of an instance and returns the chemical family that that species belongs to;
     determination is based on IUPAC naming conventions by suffix'''
-    iupac_suffices = {  'ate':'Acetates', # Esters might be preferable outside the context of the current datasets
-                        'ol':'Alcohols',
-                        'al':'Aldehydes',
-                        'ane':'Alkanes',
-                        'ene':'Alkenes',
-                        'yne':'Alkynes',
-                        'ine':'Amines',
-                        'oic acid': 'Carboxylic Acids',
-                        'ether':'Ethers',
-                        'one':'Ketones'  }                    
-    for suffix, family in iupac_suffices.items():
-        if re.search(f'(?i){suffix}\Z', isolate_species(species)): # ignore capitalization (particular to ethers), only check end of name (particular to pinac<ol>one)
+    species = isolate_species(species)
+    for suffix_pattern, family in _SUFFIX_PATTERNS:
+        if suffix_pattern.search(species):
             return family
     else:
         return 'Unknown'
-    
+
+@functools.lru_cache(maxsize=4096)
 def get_carbon_ordering(species):
     '''Naive method to help with ordering compound names based on carbon number and a handful of prefices, used to ensure cinsistent sorting by species name.
     NOTE that the number this method assigns is not precisely the carbon number, but an analog that allows for numerical ordering in the desired manner'''
-    iupac_numbering = {'meth' : 1,
-                       'eth(?!er)' : 2, # prevents all ethers from being assigned "2"
-                       'prop' : 3,
-                       'but'  : 4,
-                       'pent' : 5,
-                       'hex'  : 6,
-                       'hept' : 7,
-                       'oct'  : 8,
-                       'non(?!e)' : 9, # prevents all ketones from being assigned "9"
-                       'dec'  : 10}
-    for affix, number in iupac_numbering.items():
-        if re.search(f'(?i){affix}', species): # ignore capitalization (finds affix anywhere in word)
-            return number + 0.5*bool(re.search(f'(?i)(iso|sec-){affix}', species)) # places "iso" and "sec-" compounds slightly lower on the list (+0.5, between compounds)
+    for affix_pattern, branched_pattern, number in _CARBON_PATTERNS:
+        if affix_pattern.search(species):
+            return number + 0.5*bool(branched_pattern.search(species)) # places "iso" and "sec-" compounds slightly lower on the list (+0.5, between compounds)
     else:
         return 100 # arbitrary, needs to return a number much greater than the rest to be placed at end
 
-Instance = collections.namedtuple('Instance', ['name', 'species', 'family', 'spectrum', 'vector']) # provide class-like encoding of instances
+class Instance(typing.NamedTuple):
+    '''Provides class-like encoding of instances; spectra are stored as (packed) numpy arrays rather than lists of Python floats'''
+    name     : str
+    species  : str
+    family   : str
+    spectrum : np.ndarray
+    vector   : list
+
+class _LazyChemData(collections.abc.Sequence):
+    '''Read-only sequence of Instances, built from raw json properties (and optionally a separate spectra array).
+    Each Instance is only constructed (and then cached) when first accessed, making loading cheap when only part of a dataset is used'''
+    def __init__(self, raw_data, spectra=None):
+        self.raw_data = raw_data
+        self.spectra  = spectra
+        self.cache    = {}
+        
+    def __len__(self):
+        return len(self.raw_data)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        
+        index = range(len(self))[index] # normalizes negative indices and raises IndexError when out of bounds (which also terminates iteration)
+        if index not in self.cache:
+            name, species, family, spectrum, vector = self.raw_data[index]
+            spectrum = self.spectra[index] if self.spectra is not None else np.asarray(spectrum, dtype=float) # older jsons contain the spectra inline, as lists
+            self.cache[index] = Instance(name, species, family, spectrum, vector)
+        return self.cache[index]
+    
+class _JsonLinesRows(collections.abc.Sequence):
+    '''Read-only sequence of the rows of a JSON Lines file, each of which is only parsed when accessed. Rows are located via
+    precomputed line offsets and sliced out of the raw bytes of the file, which are read once up front so that the file is not held open'''
+    def __init__(self, path, offsets):
+        self.offsets = offsets # start position of each line, followed by the end position of the file
+        self.data = path.read_bytes()
+            
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index):
+        return deserialize_json(self.data[self.offsets[index]:self.offsets[index + 1]])
 
         
 #file and path utilities
@@ -131,53 +229,99 @@ def sanitized_path(path, ext='.json'):
         raise TypeError(f'Input must be a(n) {ext} file')
     else:
         return path
+    
+@contextlib.contextmanager
+def replacing_file(path, mode='wb', **kwargs):
+    '''Context manager for (re)writing a file without modifying it in-place: yields a temporary file alongside the target,
+    which only replaces the target once writing finishes successfully. If writing fails, any existing file at the path is left intact'''
+    temp_path = path.with_name(f'{path.name}.tmp')
+    try:
+        with temp_path.open(mode=mode, **kwargs) as temp_file:
+            yield temp_file
+        os.replace(temp_path, path) # atomic, so readers only ever see the old or the new file in full
+    finally:
+        if temp_path.exists(): # only left behind if writing failed
+            temp_path.unlink()
+    
+def serialize_json(data):
+    '''Serialize data to json bytes, using orjson if it is available. Numpy arrays are serialized as lists'''
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=lambda obj : obj.tolist()).encode() # numpy arrays are not natively serializable by json
+
+def deserialize_json(raw):
+    '''De-serialize json bytes (or a string), using orjson if it is available'''
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def read_json(path):
+    '''Read and de-serialize a json file'''
+    return deserialize_json(path.read_bytes()) # file is read in one shot, as bytes, to avoid text decoding overhead
+        
+def write_json(data, path):
+    '''Serialize data to a json file'''
+    path.write_bytes(serialize_json(data))
 
 def load_chem_json(source_path):
-    '''Read a chemical data json, de-serializes the Instance objects from "chem_data", and return the contents of the file'''
+    '''Read a chemical data json, de-serializes the Instance objects from "chem_data", and return the contents of the file.
+    If the instances and spectra were stored in separate .jsonl and .npy files (as done by jsonize), they are read from those files'''
     source_path = sanitized_path(source_path)
-    with source_path.open(mode='r') as source_file:
-        json_data = json.load(source_file) # this comment is a watermark - 2020, timotej bernat
-        json_data['chem_data'] = [Instance(*properties) for properties in json_data['chem_data']] # unpack the properties into Instance objects
+    json_data = read_json(source_path) # this comment is a watermark - 2020, timotej bernat
+    
+    raw_data, spectra = json_data.get('chem_data'), None # older jsons contain the instances and spectra inline, rather than in separate files
+    if 'instances_file' in json_data: # instances are only parsed as they are accessed, so the whole dataset need never be held in memory at once
+        raw_data = _JsonLinesRows(source_path.parent/json_data['instances_file'], json_data['instance_offsets'])
+    if 'spectra_file' in json_data: # spectra are read as a raw binary matrix, and never parsed from text; read in full rather than memory-mapped, so the file is not held open
+        spectra = np.load(source_path.parent/json_data['spectra_file'])
+    json_data['chem_data'] = _LazyChemData(raw_data, spectra) # properties are only unpacked into Instance objects as they are accessed
     return json_data
 
 def jsonize(source_path, correct_names=False): 
     '''Process spectral data csvs, generating labels, vector mappings, species counts, and other information,
-    then cast the data to a json for ease of data reading in other applications and methods'''
+    then cast the data to a json for ease of data reading in other applications and methods. Instances (one per line) and spectra (in binary) are
+    stored separately, in .jsonl and .npy files of the same name, which must be kept alongside the json'''
     source_path = sanitized_path(source_path, ext='.csv')
-    rep_flags = {'MIBK' : 'Methyl-iBu-Ketone', # dictionary of names to flag and replace to ensure total consistency of naming between files
-                'Propanol' : '1-Propanol',     # add flags as they come up, these are the ones for Modes 1-3 I've come across so far
-                'Butanol'  : '1-Butanol',
-                'Pentanol' : '1-Pentanol',
-                'Hexanol'  : '1-Hexanol',
-                'Heptanol' : '1-Heptanol',
-                'Octanol'  : '1-Octanol',
-                'IsoButanol'  : 'Isobutanol',
-                'Iso-Butanol' : 'Isobutanol',
-                'Sec Butyl Acetate' : 'Sec-Butyl Acetate',
-                'Secbutyl Acetate'  : 'Sec-Butyl Acetate'} 
-    temp_dict = {}
     with source_path.open() as csv_file:
-        for row in csv.reader(csv_file):
-            name, spectrum = row[0], [float(i) for i in row[1:]] # isolate the instance name and spectrum for ease of reference
-            if correct_names:
-                species = isolate_species(name) # regex only replaces if string occurs at beginning (to avoid the "2-1-Propanol" bug)
-                name = re.sub(f'\A{species}', rep_flags.get(species, species), name) # replaced string will only be different if it appears in the flags dict     
-
-            try: # error checking to ensure all spectra are of the same size - based entirely on the first spectrum's length
-                if len(spectrum) != spectrum_size: 
-                    raise ValueError(f'Spectrum of {name} is of different length to the others')
-            except NameError: # take spectrum_size to be the length of the first spectrum encountered (in that case, spectrum_size is as yet unassigned)
-                spectrum_size = len(spectrum)
-                
-            temp_dict[name] = spectrum # if all checks and corrections are passed, map the name to the spectrum
-    
-    species, species_count = ordered_and_counted(isolate_species(instance) for instance in temp_dict.keys())
-    families, family_count = ordered_and_counted(get_family(instance) for instance in temp_dict.keys())      
+        rows = list(csv.reader(csv_file))
+    
+    names = [row[0] for row in rows]
+    if correct_names:
+        for i, name in enumerate(names):
+            species = isolate_species(name) # regex only replaces if string occurs at beginning (to avoid the "2-1-Propanol" bug)
+            names[i] = re.sub(f'\A{species}', _REP_FLAGS.get(species, species), name) # replaced string will only be different if it appears in the flags dict     
+
+    spectrum_size = len(rows[0]) - 1 # error checking to ensure all spectra are of the same size - based entirely on the first spectrum's length
+    for name, row in zip(names, rows):
+        if len(row) - 1 != spectrum_size: 
+            raise ValueError(f'Spectrum of {name} is of different length to the others')
+            
+    spectra = np.array([row[1:] for row in rows], dtype=float) # all values are parsed into a single matrix in one numpy call, rather than one float() call per value
+    temp_dict = dict(zip(names, spectra)) # if all checks and corrections are passed, map the name to the spectrum
+    
+    species_of = {name : isolate_species(name) for name in temp_dict} # determine the species and family of each instance exactly once, for reuse below
+    family_of  = {name : get_family(species) for name, species in species_of.items()}
+    
+    species, species_count = ordered_and_counted(species_of.values())
+    families, family_count = ordered_and_counted(family_of.values())      
     family_mapping = one_hot_mapping(families)  # dict of onehot mapping vectors by family   
-    chem_data = [(name, isolate_species(name), get_family(name), spectrum, family_mapping[get_family(name)]) for name, spectrum in temp_dict.items()] 
+    vector_of  = {name : family_mapping[family] for name, family in family_of.items()}
+    chem_data  = [(name, species_of[name], family_of[name], None, vector_of[name]) for name in temp_dict] # spectra are filled in from the .npy file when loading
+    
+    dest_path = source_path.parent/f'{source_path.stem}{correct_names and "(@)" or ""}.json' # add indicator to target name if correcting names
+    spectra_path = dest_path.with_suffix('.npy')
+    with replacing_file(spectra_path) as spectra_file: # never overwritten in-place, so datasets already loaded from a previous jsonize are unaffected
+        np.save(spectra_file, np.stack(list(temp_dict.values()))) # spectra stored as a raw binary matrix (rows in the same order as chem_data), avoiding text float parsing on load
+    
+    instances_path, instance_offsets = dest_path.with_suffix('.jsonl'), [0]
+    with replacing_file(instances_path) as instances_file: # never overwritten in-place, as the offsets of datasets already loaded refer to the old file
+        for properties in chem_data: # one instance per line, with the position of each line recorded to allow for random access when loading
+            line = serialize_json(properties) + b'\n'
+            instances_file.write(line)
+            instance_offsets.append(instance_offsets[-1] + len(line))
     
     packaged_data = {   # package all the data into a single dict for json dumping
-        'chem_data' : chem_data,
+        'instances_file'   : instances_path.name,
+        'instance_offsets' : instance_offsets,
+        'spectra_file' : spectra_path.name,
         'species'   : species,
         'families'  : families,
         'family_mapping' : family_mapping,
@@ -185,11 +329,7 @@ def jsonize(source_path, correct_names=False):
         'species_count'  : species_count,
         'family_count'   : family_count
     }
-    
-    dest_path = source_path.parent/f'{source_path.stem}{correct_names and "(@)" or ""}.json' # add indicator to target name if correcting names
-    dest_path.touch() # create the new file
-    with dest_path.open(mode='w') as json_file:
-        json.dump(packaged_data, json_file) # dump our data into a json file with the same name as the original datacsv
+    write_json(packaged_data, dest_path) # dump our data into a json file with the same name as the original datacsv
         
 def csvize(source_path):
     '''Inverse of jsonize, takes a processed chemical data json file and reduces it to a csv with just the listed spectra'''
@@ -199,52 +339,43 @@ def csvize(source_path):
     dest_path.touch()
     with dest_path.open(mode='w', newline='') as dest_file:
         for instance in json_data['chem_data']:
-            csv.writer(dest_file).writerow([instance.name, *instance.spectrum]) # merge name and spectral data into a single row and write it to the csv
+            csv.writer(dest_file).writerow([instance.name, *instance.spectrum.tolist()]) # merge name and spectral data into a single row and write it to the csv
 
 def get_by_filetype(extension, path=Path.cwd()):  
-    '''Get all files of a particular file type present in a given directory, (the current directory by default)'''
-    if type(path) == str:
-        path = Path(path) # convert any string input (i.e. just the name) into Path object
-    
-    filetypes_present = tuple(file.stem for file in path.iterdir() if file.suffix == extension)
-    if filetypes_present == ():
-        filetypes_present = (None,)
-    return filetypes_present
+    '''Get the names (without extension) of all files of a particular file type present in a given directory, (the current directory by default).
+    Returns an empty tuple if there are no such files; use "get_by_filetype(...) or (None,)" where a placeholder entry is needed'''
+    with os.scandir(path) as entries: # scandir accepts strings and Paths, and avoids creating a Path object for every entry
+        split_names = [os.path.splitext(entry.name) for entry in entries] # splits names in the same manner as Path.stem and Path.suffix
+    return tuple(stem for stem, suffix in split_names if suffix == extension)
 
 def add_csv_column(csv_path, new_col_data):
     '''Takes a csv path and an iterable of data and appends the data to the csv as the rightmost column.
     If no such csv exists, will create a new csv with a single column consisting of the data passed'''
     if type(csv_path) == str:
         csv_path = Path(csv_path) # ensure path is a Path object
-              
-    temp_path = Path(csv_path.parent, f'tmp{csv_path.name}') # a temporary file to write into
-    temp_path.touch() # create file at the temporary location
     
-    with temp_path.open(mode='w', newline='') as outfile:
+    with replacing_file(csv_path, mode='w', newline='') as outfile: # extended rows are streamed into a temporary file, which only replaces the original once complete
         if not csv_path.exists(): # if the original file doesn't exist, simply write the contents to the temporary file (will be renamed later)
             for entry in new_col_data:
                 outfile.write(f'{entry}\n')
         else:
-            with csv_path.open(mode='r') as infile:
+            with csv_path.open(mode='r', newline='') as infile:
                 reader, writer = csv.reader(infile), csv.writer(outfile) # create csv parsing objects
                 for row, entry in zip(reader, new_col_data): # note that zip will truncate any data that doesn't fit into the file
                     row.append(entry)    # append relevant entry to each row
-                    writer.writerow(row) # write extended row to temporary file  
-            csv_path.unlink()          # delete the original file
-        
-    temp_path.rename(csv_path) # rename the temporary file to that of the original, replacing it
+                    writer.writerow(row) # write extended row to temporary file
 
 def clear_folder(path):
     '''Recursively clear out the contents of a folder. A more tactful approach than deleting the folder and remaking it'''
     if not path.is_dir():
         raise ValueError(f'{path} does not point to a folder')
     
-    for file in path.iterdir():
-        if file.is_dir():
-            clear_folder(file) # recursively clear any subfolders, as path can only delete empty files
-            try:
-                file.rmdir()
-            except OSError: # meant for the case where the file won't be deleted because the user is still inside it
-                raise PermissionError # convert to permission error (which my file checkers are built to handle)
-        else:
-            file.unlink()
\ No newline at end of file
+    with os.scandir(path) as entries: # scandir avoids creating a Path (and making a separate stat call) for each entry
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                try:
+                    shutil.rmtree(entry.path) # removes subfolders and all their contents in one go
+                except OSError: # meant for the case where the file won't be deleted because the user is still inside it
+                    raise PermissionError # convert to permission error (which my file checkers are built to handle)
+            else:
+                os.unlink(entry.path)
\ No newline at end of file
@@ -1,7 +1,11 @@
 import cmath
+import functools
 import numpy as np
 from iumsutils import *
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
+from matplotlib.patches import Circle, Patch, Rectangle
+from matplotlib.collections import LineCollection, PatchCollection
 
 class Multiplot:
     '''Base class for creating easily referenceable objects to subplot into. Effectively a wrapper for plt.subplots'''
@@ -17,14 +21,14 @@ class Multiplot:
                 ncols = ceildiv(span, nrows) # deduce required number of columns from number of rows
         self.nrows, self.ncols = nrows, ncols
                 
-        self.fig, self.axes = plt.subplots(nrows, ncols, figsize=(figsize*ncols, figsize*nrows)) # dimensions must be backwards to scale properly
-        self.axes = np.array(self.axes).reshape(nrows, ncols) # ensure that axes object has two dimensions, even in scalar/vector cases
+        self.fig, self.axes = plt.subplots(nrows, ncols, squeeze=False, figsize=(figsize*ncols, figsize*nrows)) # dimensions must be backwards to scale properly; disabling squeeze ensures that axes object has two dimensions, even in scalar/vector cases
         
     def draw(self, plot, index=(0,0)): 
         '''Wrapper for drawing plots in a more OOP-friendly? fashion. Relies upon the draw method for objects in this module being defined approriately'''
-        if type(index) == int:
-            index = divmod(index, self.ncols) # allow for linear indexing based on size        
-        plot.draw(self.axes, index) #!!CRITICAL!! - prereq for all objects which follow is that they have a draw method which accepts and Axes object and an index
+        axes = self.axes
+        if isinstance(index, int):
+            axes = self.axes.flat # allow for linear indexing based on size, via a flat view of the axes rather than converting to a 2D index
+        plot.draw(axes, index) #!!CRITICAL!! - prereq for all objects which follow is that they have a draw method which accepts and Axes object and an index
         
     def draw_series(self, plot_set):
         '''Used to plot an iterable of plot objects; leverages linear indexing capability'''
@@ -35,7 +39,7 @@ class Multiplot:
         '''Wrapper for saving Multiplots'''
         self.fig.savefig(file_name)
         if close:
-            plt.close() # by default, will close plots after saving to prevent clutter of the jupyter window and of memory
+            plt.close(self.fig) # by default, will close plots after saving to prevent clutter of the jupyter window and of memory; closes this figure specifically, rather than whichever is current
         
 def single_plot(plot_obj, save_dir=None, figsize=20):
     '''Boilerplate for creating a 1-panel Multiplot, plotting a particular plot object, and saving it to a desired location'''
@@ -50,20 +54,19 @@ class Mapped_Unit_Circle:
     '''Base background unit circle class used to create Radar Charts'''
     def __init__(self, mapping):
         self.mapping = mapping
-        theta = np.linspace(0, cmath.tau, 100)
-        self.circle = (np.cos(theta), np.sin(theta))  # generic black unit circle, preset for all SD objects
-           
         self.N = len(mapping) 
         self.labels = tuple(mapping.keys())
-        self.poles  = [cmath.exp(1j* i*cmath.tau/self.N) for i in range(self.N)] # poles at the Nth roots of unity
+        self.hotbits = {family : int(np.argmax(vector)) for family, vector in mapping.items()} # position of the hot bit in each family's one-hot vector, found once rather than per lookup
+        self.poles  = np.exp(1j*np.arange(self.N)*cmath.tau/self.N).astype(np.complex64) # poles at the Nth roots of unity, as an array to allow for vectorized projection of aavs
+        self.radii  = [[(0, 0), (pole.real, pole.imag)] for pole in self.poles] # segments from the origin to each root, drawn together as a single collection
         
     def draw(self, ax):
-        ax.plot(*self.circle, 'k-')
-        for i, (label, pole) in enumerate(zip(self.labels, self.poles)): # pass the poles and axes to the internal unit circle
-            x, y = pole.real, pole.imag # unpack components f values
-            #ax.plot(x, y, 'ro')        # plot the roots of unity
-            ax.plot([0, x], [0, y], 'y--')  # plot radial lines to each root
-            ax.annotate(label, (x, y), ha='center') # label each root with the associated family, center horizontally
+        linewidth = plt.rcParams['lines.linewidth']
+        ax.add_patch(Circle((0, 0), 1, fill=False, edgecolor='k', linewidth=linewidth, gid='unit_circle')) # generic black unit circle, preset for all SD objects; gid allows the circle to be identified when overlaying
+        ax.add_collection(LineCollection(self.radii, colors='y', linestyles='--', linewidths=linewidth)) # plot radial lines to each root, as one artist rather than one per root
+        for label, pole in zip(self.labels, self.poles):
+            ax.annotate(label, (pole.real, pole.imag), ha='center') # label each root with the associated family, center horizontally
+        ax.autoscale_view() # patches and collections, unlike plotted lines, do not rescale the axes automatically
 
 class Base_RC:
     '''Base Radar Chart class. Builds unit circle based on species mapping, can plot set of point along with unreduced centroid'''     
@@ -75,27 +78,27 @@ class Base_RC:
         
     def __init__(self, title, points, point_symbol='gx', centroid_symbol='b*'):
         self.title = title
-        self.points = points
+        self.points = np.asarray(points, dtype=np.complex64) # coerced to an array to allow for vectorized centroid computation and plotting
         
         self.point_symbol = point_symbol
-        self.centroid = sum(self.points)/len(points)
+        self.centroid = self.points.mean()
         self.centroid_symbol = centroid_symbol
    
     def plot_point(self, coords, ax, symbol='ro', size=6):
+        '''Plots either a single point or an array of (complex) points; arrays are drawn as a single scatter artist, rather than one artist per point'''
         color, marker = symbol # unpack color and marker info from passed symbol - allows for tuple of color and marker to bypass single-character limit
-        if type(coords) != tuple:
-            coords = (coords.real, coords.imag)
-        ax.plot(*coords, color=color, marker=marker, markersize=size) 
+        if not isinstance(coords, tuple):
+            coords = (np.real(coords), np.imag(coords))
+        ax.scatter(*coords, color=color, marker=marker, s=size**2) # scatter sizes are areas, so are the square of the equivalent marker size
         
     def draw(self, axes, index=(0,0)):
         ax = axes[index] # index subplots within the passed plt.Axes object
         ax.set_title(self.title)
         
-        if not ax.lines: # only draw a circle if one isn't already there; for overlay purposes. NOTE TO SELF: check if better param than "lines" exists
+        if not any(patch.get_gid() == 'unit_circle' for patch in ax.patches): # only draw a circle if one isn't already there; for overlay purposes
             self.unit_circle.draw(ax) # plot the unit circle background
         
-        for point in self.points:
-            self.plot_point(point, ax, symbol=self.point_symbol)
+        self.plot_point(self.points, ax, symbol=self.point_symbol)
             
         if self.centroid_symbol: # only plot the centroid if it is called for
             self.plot_point(self.centroid, ax, symbol=self.centroid_symbol, size=14)
@@ -104,21 +107,32 @@ class Instance_RC(Base_RC):
     '''0-order Radar Chart class for plotting the axial components and single centroid of a single instance'''
     def __init__(self, dataset, inst_name, point_symbol='gx', centroid_symbol='b1'):
         aavs = dataset[get_family(inst_name)][isolate_species(inst_name)][inst_name] # perform the appropriate lookup for the species
-        axial_points = [aav*pole for (aav, pole) in zip(aavs, Base_RC.unit_circle.poles)] # multiply aavs by axial conponents to obtain set of points
+        axial_points = np.asarray(aavs, dtype=np.float32)*self.unit_circle.poles # multiply aavs by axial conponents to obtain set of points, as a single elementwise complex64 product
         
         super().__init__(inst_name, axial_points, point_symbol, centroid_symbol)
-        self.centroid *= Base_RC.unit_circle.N # scale centroid by number of points in this case to better adhere to unit circle
+        self.centroid *= self.unit_circle.N # scale centroid by number of points in this case to better adhere to unit circle
         
 class Species_RC(Base_RC):
     '''1-order Radar Chart class for plotting centroid of all instances of a species'''
     def __init__(self, dataset, species, point_symbol='b1', centroid_symbol='m*'):
-        inst_centroids = [Instance_RC(dataset, instance).centroid for instance in dataset[get_family(species)][species]]
+        inst_centroids = self.instance_centroids(dataset, species)
         super().__init__(species, inst_centroids, point_symbol, centroid_symbol)
         
+    @classmethod
+    def instance_centroids(cls, dataset, species):
+        '''Computes the centroids of every instance of a species (identical to those of their Instance_RCs) in a single matrix product, without building any Instance_RCs'''
+        aav_matrix = np.asarray(list(dataset[get_family(species)][species].values()), dtype=np.float32) # one row of aavs per instance
+        return aav_matrix @ cls.unit_circle.poles # sum of aav-weighted poles, i.e. the mean scaled by N as in Instance_RC
+    
+    @classmethod
+    def species_centroid(cls, dataset, species):
+        '''Centroid of a species (identical to that of its Species_RC), without building the Species_RC'''
+        return cls.instance_centroids(dataset, species).mean()
+        
 class Family_RC(Base_RC):
     '''2-order Radar Chart class for plotting centroid of all instances of a family'''
     def __init__(self, dataset, family, point_symbol='m*', centroid_symbol='cs'):
-        spec_centroids = [Species_RC(dataset, species).centroid for species in dataset[family]]
+        spec_centroids = [Species_RC.species_centroid(dataset, species) for species in dataset[family]]
         super().__init__(family, spec_centroids, point_symbol, centroid_symbol)
 
 class Overlaid_Family_RC(Base_RC):
@@ -143,15 +157,23 @@ class Overlaid_Family_RC(Base_RC):
         self.point_symbols = {family : (self.colors[family], self.point_marker) for family in dataset}
         self.centroid_symbols = {family : (self.colors[family], self.centroid_marker) for family in dataset}
         self.famsds = [Family_RC(dataset, family, point_symbol=self.point_symbols[family], centroid_symbol=self.centroid_symbols[family]) for family in dataset]
+        
+        self.points = np.concatenate([fsd.points for fsd in self.famsds]) # points and centroids of all families are pooled, with parallel colors, to be drawn as one artist each
+        self.point_colors = [self.colors[family] for family, fsd in zip(dataset, self.famsds) for _ in fsd.points]
+        self.centroids = np.array([fsd.centroid for fsd in self.famsds])
+        self.centroid_colors = [self.colors[family] for family in dataset]
+        self.legend_handles = [Line2D([], [], linestyle='', color=color, marker=marker) for (color, marker) in self.point_symbols.values()] # proxy artists for the legend, never added to any axes
     
     def draw(self, axes, index=(0,0)):
         ax = axes[index]
-        for fsd in self.famsds:
-            fsd.draw(axes, index) # draw over one another
         ax.set_title(self.title)
+        
+        if not any(patch.get_gid() == 'unit_circle' for patch in ax.patches): # only draw a circle if one isn't already there; for overlay purposes
+            self.unit_circle.draw(ax)
+        self.plot_point(self.points, ax, symbol=(self.point_colors, self.point_marker)) # all families drawn over one another in a single scatter
+        self.plot_point(self.centroids, ax, symbol=(self.centroid_colors, self.centroid_marker), size=14)
             
-        symbols = [ax.scatter(np.nan, np.nan, color=color, marker=marker) for (color, marker) in self.point_symbols.values()] # plot fake points for legend
-        ax.legend(symbols, self.point_symbols.keys(), loc='lower right')
+        ax.legend(self.legend_handles, self.point_symbols.keys(), loc='lower right')
         
 class Macro_RC(Base_RC):
     '''3-order Radar Chart from plotting trends across all data'''
@@ -161,13 +183,20 @@ class Macro_RC(Base_RC):
        
     
 # Line Plot classes
+@functools.lru_cache(maxsize=32)
+def _x_axis(x_range, num):
+    '''Evenly-spaced x-axis array, shared between plots with the same range and number of points; bounded, so only recently used axes are retained'''
+    x_data = np.linspace(*x_range, num=num)
+    x_data.flags.writeable = False # cached array is shared, so guard against in-place modification
+    return x_data
+
 class Line_Plot:
     '''Basic class for plotting lines, allows for multiple lines, scalable x-axis, and moveable legends, within the confines of the Multiplot framework'''
     def __init__(self, *args, x_range=None, title=None, legend_pos=None, colormap={'line' : 'c'}):
         self.lines = args
         self.x_data = None
         if x_range:
-            self.x_data = list(np.linspace(*x_range, num=len(self.lines[0]))) # made into list to avoid annoying numpy multi-element truth value error
+            self.x_data = _x_axis(tuple(x_range), len(self.lines[0]))
         
         self.legend_pos = legend_pos
         self.colormap = colormap
@@ -178,7 +207,7 @@ class Line_Plot:
         ax.set_title(self.title)
         
         for line, (label, color) in zip(self.lines, self.colormap.items()):
-            if self.x_data: 
+            if self.x_data is not None: 
                 ax.plot(self.x_data, line, color, label=label)
             else:
                 ax.plot(line, color, label=label)
@@ -200,20 +229,19 @@ class PWA_Plot(Line_Plot):
     }
     
     def __init__(self, spectra, species):
-        self.spectra  = np.array(spectra)
+        self.spectra  = np.asarray(spectra, dtype=np.float32) # single precision is ample for plotting, and halves the memory traffic of the reductions
         self.maxima   = np.amax(self.spectra, axis=0)
-        self.averages = np.average(self.spectra, axis=0)
+        self.averages = self.spectra.mean(axis=0, dtype=np.float64) # accumulate in double precision, so that averaging many spectra does not lose precision
         self.minima   = np.amin(self.spectra, axis=0)
         super().__init__(self.maxima, self.averages, self.minima, title=species, legend_pos='upper right', colormap=self.colormap)
         
 class Fermi_Plot(Single_Line_Plot):
     '''Child class of Single_Line_Plot for producing Fermi-Dirac plots from species-wide aavs'''
     def __init__(self, dataset, species, hotbit, precision=4):
-        predictions = dataset[get_family(species)][species].values() # pull out a list of aavs      
-        targets = [pred[hotbit] for pred in predictions]
-        targets.sort(reverse=True) # arrange target aavs in descending order       
+        predictions = np.asarray(list(dataset[get_family(species)][species].values()), dtype=float) # pull out the aavs as an array, one row per instance
+        targets = np.sort(predictions[:, hotbit])[::-1] # arrange target aavs in descending order       
         
-        n_correct = sum(max(pred) == pred[hotbit] for pred in predictions) # "correct" defined to be when true identity is assigned the highest probability
+        n_correct = int((predictions.max(axis=1) == predictions[:, hotbit]).sum()) # "correct" defined to be when true identity is assigned the highest probability
         n_total = len(predictions) 
         self.score = round(n_correct/n_total, precision)
         
@@ -238,6 +266,8 @@ class Multibar: # this will serve as the base bar class, as ordinary bar graphs
     def __init__(self, group_labels, sub_labels, *datasets, title=None, ylim=None, legend_pos=None):
         if len(datasets) != len(sub_labels):
             raise ValueError('Number of datasets must match number of sub labels')
+        if any(np.shape(dataset) != (len(group_labels),) for dataset in datasets):
+            raise ValueError('Each dataset must have exactly one value per group label')
          
         self.datasets     = datasets # unpacked, to allow for arbitrarily many (or few) inputs
         self.group_labels = group_labels
@@ -247,6 +277,9 @@ class Multibar: # this will serve as the base bar class, as ordinary bar graphs
         
         self.bar_width = self.bar_group_width/self.n_per_group # width of an individual bar within a group
         self.x = np.arange(self.n_bar_groups)
+        offsets = self.bar_width*(np.arange(self.n_per_group) - (self.n_per_group-1)/2) # amount to offset each set of bars from unit ticks
+        self.bar_lefts = (self.x[None, :] + offsets[:, None] - self.bar_width/2).ravel() # left edges of all bars, one row of groups per dataset
+        self.bar_colors = np.repeat(self.colors[:self.n_per_group], self.n_bar_groups) # color of each bar, matched to its dataset
         
         self.title = title
         self.ylim  = ylim
@@ -259,14 +292,16 @@ class Multibar: # this will serve as the base bar class, as ordinary bar graphs
         ax.set_xticks(self.x)
         ax.set_xticklabels(self.group_labels)
 
-        for i, dataset in enumerate(self.datasets):
-            offset = self.bar_width*(i - (self.n_per_group-1)/2) # amount to offset each set of bars from unit ticks
-            ax.bar(self.x + offset, dataset, width=self.bar_width, color=self.colors[i], align='center')
+        heights = np.ravel(self.datasets)
+        bars = PatchCollection([Rectangle((left, 0), self.bar_width, height) for left, height in zip(self.bar_lefts, heights)], facecolors=self.bar_colors, linewidths=0) # all bars drawn as a single artist
+        bars.sticky_edges.y.append(0) # keep bars flush with the x-axis when autoscaling, as ax.bar does
+        ax.add_collection(bars)
+        ax.autoscale_view()
 
         if self.ylim:
             ax.set_ylim(self.ylim)
         if self.legend_pos:
-            ax.legend(self.sub_labels, loc=self.legend_pos)
+            ax.legend([Patch(color=color) for color in self.colors[:self.n_per_group]], self.sub_labels, loc=self.legend_pos) # collection has no per-dataset artists, so legend is built from proxies
             
 class AAV_Bars(Multibar):
     '''class used for plotting bar charts of the AAVS of a particular species'''
@@ -274,12 +309,20 @@ class AAV_Bars(Multibar):
         super().__init__(families, [inst_name], aavs, title=inst_name, ylim=(0,1))
         
 # miscellaneous/combined classes
+_score_frame = None # 2x2 frame reused by plot_and_get_score, rather than building a new figure for every species
+
 def plot_and_get_score(species, spectra, dataset, metric_data, metric_final, savedir='.', metric_name='Error'):
     '''Rolls several classes into one convenient method for producing species summary plots and generating scores'''
-    frame = Multiplot(nrows=2, ncols=2)
+    global _score_frame
+    if _score_frame is None:
+        _score_frame = Multiplot(nrows=2, ncols=2)
+        plt.close(_score_frame.fig) # detach the frame from pyplot to prevent it from displaying; it can still be drawn into and saved
+    frame = _score_frame
+    for ax in frame.axes.flat:
+        ax.clear() # wipe the previous species' panels
 
     radar_chart = Species_RC(dataset, species) # radar chart not created in-place to extract the hot bit
-    hotbit = radar_chart.unit_circle.mapping[get_family(species)].index(1) # deduce hotbit from mapping and current species
+    hotbit = radar_chart.unit_circle.hotbits[get_family(species)] # deduce hotbit from mapping and current species
     
     fermi_plot = Fermi_Plot(dataset, species, hotbit) # fermi plot not created in-place in order to extract the score
     score = fermi_plot.score
@@ -290,7 +333,6 @@ def plot_and_get_score(species, spectra, dataset, metric_data, metric_final, sav
     frame.draw(metric_plot, 1)
     frame.draw(fermi_plot, 2)  
     frame.draw(radar_chart, 3)
-    frame.save(f'{savedir}/{species}') # draw all four panels, then save the figure to the appropriate folder under the species' name
-    plt.close() # prevent figure from displaying
+    frame.save(f'{savedir}/{species}', close=False) # draw all four panels, then save the figure to the appropriate folder under the species' name; frame is kept open, to be cleared and reused for the next species
     
     return score
\ No newline at end of file